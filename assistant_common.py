@@ -0,0 +1,56 @@
+"""
+Shared building blocks for both assistants (simple + Vertex AI)
+Odoo bootstrap and request keyword matching live here once
+"""
+import re
+import functools
+
+# --- Odoo Connection & Shared Tools (lazily, once per process) ---
+@functools.lru_cache(maxsize=1)
+def bootstrap_tools() -> dict:
+    """Connect to Odoo once per process and build the shared tool instances"""
+    # Our tools subclass CrewAI's BaseTool, so import them only when needed
+    from tools.odoo_connection import OdooConnection
+    from tools.customer_tools import OdooCustomerInfoTool
+    from tools.multilingual_product_tools import (
+        OdooMultilingualProductFinder,
+        OdooMultilingualProductUpdater,
+        MultilingualProductContentGenerator
+    )
+
+    print("\n🔗 Connecting to Odoo...")
+    odoo_conn = OdooConnection()
+    if not odoo_conn.connect():
+        print("❌ Failed to connect to Odoo. Exiting...")
+        exit()
+
+    if not odoo_conn.test_connection():
+        print("❌ Odoo connection test failed. Exiting...")
+        exit()
+
+    # One immutable session object, shared by reference by every Odoo tool
+    session = odoo_conn.get_session()
+
+    print("🛠️ Initializing tools...")
+    tools = {
+        'customer': OdooCustomerInfoTool(session),
+        'finder': OdooMultilingualProductFinder(session),
+        'updater': OdooMultilingualProductUpdater(session),
+        'content': MultilingualProductContentGenerator(),
+    }
+
+    print("✅ All tools initialized successfully!")
+    return tools
+
+# --- Request Keyword Matching ---
+# Customer/Contact related keywords (simple lookups in both assistants)
+CUSTOMER_KEYWORDS = (
+    'customer', 'who is', 'find customer', 'contact', 'email address', 'phone', 'mobile',
+    'email of', 'contact for', 'address of', 'phone of', 'mobile of', 'information about',
+    'details of', 'find', 'search for', 'look up', 'brico', 'company', 'client',
+    'partner', 'supplier', 'vendor', 'contact details', 'customer info'
+)
+
+def keyword_pattern(keywords) -> re.Pattern:
+    """Compile keywords into one case-insensitive alternation (same substring semantics as `in`)"""
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
@@ -4,136 +4,78 @@ Simple Smart Assistant - Direct Tool Usage (No CrewAI LLM issues)
 """
 import os
 from dotenv import load_dotenv
-from tools.odoo_connection import OdooConnection
-from tools.customer_tools import OdooCustomerInfoTool
-from tools.multilingual_product_tools import (
-    OdooMultilingualProductFinder, 
-    OdooMultilingualProductUpdater,
-    MultilingualProductContentGenerator
-)
+from assistant_common import bootstrap_tools, CUSTOMER_KEYWORDS, keyword_pattern
 
 load_dotenv()
 print("🎯 Simple Smart Assistant - Direct Odoo Integration")
 print("✅ No LLM rate limit issues - Direct tool usage")
 print("=" * 60)
 
-# --- Initialize Odoo Connection ---
-print("\n🔗 Connecting to Odoo...")
-odoo_conn = OdooConnection()
-if not odoo_conn.connect():
-    print("❌ Failed to connect to Odoo. Exiting...")
-    exit()
-
-if not odoo_conn.test_connection():
-    print("❌ Odoo connection test failed. Exiting...")
-    exit()
-
-# Get connection info for tools
-conn_info = odoo_conn.get_connection_info()
-
-# --- Initialize Tools ---
-print("🛠️ Initializing tools...")
-customer_tool = OdooCustomerInfoTool(
-    models=conn_info['models'],
-    db=conn_info['db'],
-    uid=conn_info['uid'],
-    password=conn_info['password']
-)
-
-product_finder_tool = OdooMultilingualProductFinder(
-    models=conn_info['models'],
-    db=conn_info['db'],
-    uid=conn_info['uid'],
-    password=conn_info['password']
-)
-
-product_updater_tool = OdooMultilingualProductUpdater(
-    models=conn_info['models'],
-    db=conn_info['db'],
-    uid=conn_info['uid'],
-    password=conn_info['password']
+# --- Request Analysis ---
+# Product related keywords
+PRODUCT_KEYWORDS = (
+    'product', 'item', 'inventory', 'stock', 'catalog', 'price', 'description',
+    'update product', 'modify product', 'product info', 'product details'
 )
 
-content_generator_tool = MultilingualProductContentGenerator()
-
-print("✅ All tools initialized successfully!")
+# Compiled once at import: one C-level scan per category instead of a Python loop per keyword
+_CUSTOMER_RE = keyword_pattern(CUSTOMER_KEYWORDS)
+_PRODUCT_RE = keyword_pattern(PRODUCT_KEYWORDS)
 
-# --- Request Analysis ---
 def analyze_request(user_request: str) -> str:
     """Analyze user request and determine the appropriate action"""
-    request_lower = user_request.lower()
-    
-    # Customer/Contact related keywords
-    customer_keywords = [
-        'customer', 'who is', 'find customer', 'contact', 'email address', 'phone', 'mobile',
-        'email of', 'contact for', 'address of', 'phone of', 'mobile of', 'information about',
-        'details of', 'find', 'search for', 'look up', 'brico', 'company', 'client',
-        'partner', 'supplier', 'vendor', 'contact details', 'customer info'
-    ]
-    
-    # Product related keywords
-    product_keywords = [
-        'product', 'item', 'inventory', 'stock', 'catalog', 'price', 'description',
-        'update product', 'modify product', 'product info', 'product details'
-    ]
-    
     # Check for customer/contact queries first
-    if any(keyword in request_lower for keyword in customer_keywords):
+    if _CUSTOMER_RE.search(user_request):
         return "customer_search"
-    elif any(keyword in request_lower for keyword in product_keywords):
+    elif _PRODUCT_RE.search(user_request):
         return "product_search"
     else:
         return "customer_search"  # Default to customer search
 
+# Common patterns to remove (in order of specificity), lowercase once at import
+SEARCH_PATTERNS_TO_REMOVE = (
+    'give me information about the customer ',
+    'give me information about customer ',
+    'give me information about the ',
+    'give me information about ',
+    'find customer ',
+    'search for customer ',
+    'search for ',
+    'look up customer ',
+    'look up ',
+    'email of the ',
+    'email of ',
+    'contact for the ',
+    'contact for ',
+    'phone of the ',
+    'phone of ',
+    'address of the ',
+    'address of ',
+    'details of the ',
+    'details of ',
+    'information about the ',
+    'information about ',
+    'who is the ',
+    'who is ',
+    'what is the email of the ',
+    'what is the email of ',
+    'what is the phone of the ',
+    'what is the phone of ',
+    'customer ',
+    'the '
+)
+
 def extract_search_term(user_request: str) -> str:
     """Extract the search term from user request"""
-    original_request = user_request
+    # Lowercase the request once instead of once per pattern
     request_lower = user_request.lower()
+    for pattern in SEARCH_PATTERNS_TO_REMOVE:
+        start_pos = request_lower.find(pattern)
+        if start_pos != -1:
+            # Only remove the first match of the most specific pattern
+            return (user_request[:start_pos] + user_request[start_pos + len(pattern):]).strip()
     
-    # Common patterns to remove (in order of specificity)
-    patterns_to_remove = [
-        'give me information about the customer ',
-        'give me information about customer ',
-        'give me information about the ',
-        'give me information about ',
-        'find customer ',
-        'search for customer ',
-        'search for ',
-        'look up customer ',
-        'look up ',
-        'email of the ',
-        'email of ',
-        'contact for the ',
-        'contact for ',
-        'phone of the ',
-        'phone of ',
-        'address of the ',
-        'address of ',
-        'details of the ',
-        'details of ',
-        'information about the ',
-        'information about ',
-        'who is the ',
-        'who is ',
-        'what is the email of the ',
-        'what is the email of ',
-        'what is the phone of the ',
-        'what is the phone of ',
-        'customer ',
-        'the '
-    ]
-    
-    search_term = original_request
-    for pattern in patterns_to_remove:
-        # Case-insensitive replacement
-        if pattern.lower() in search_term.lower():
-            # Find the position and replace
-            start_pos = search_term.lower().find(pattern.lower())
-            if start_pos != -1:
-                search_term = search_term[:start_pos] + search_term[start_pos + len(pattern):]
-                break  # Only remove the first match
-    
-    return search_term.strip()
+    return user_request.strip()
 
 # --- Main Application ---
 def main():
@@ -144,6 +86,11 @@ def main():
     print("   • ⚡ Direct tool usage (no LLM rate limits)")
     print("   • 🇧🇪 Optimized for Belgium")
     
+    # Connect on first use rather than at import time
+    tools = bootstrap_tools()
+    customer_tool = tools['customer']
+    product_finder_tool = tools['finder']
+    
     while True:
         try:
             user_request = input("\n🤖 What can I help you with? (or 'exit'): ").strip()
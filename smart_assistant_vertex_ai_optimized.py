@@ -4,29 +4,31 @@ Smart Assistant: Vertex AI + Cost Optimization - ULTIMATE VERSION
 Combines Vertex AI reliability with intelligent cost optimization
 """
 import os
-import json
+import asyncio
+import re
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import time
 import random
+import threading
+import atexit
+import queue
+import logging
+import logging.handlers
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
+from enum import IntEnum
+from pathlib import Path
+from typing import TYPE_CHECKING
+from assistant_common import bootstrap_tools, CUSTOMER_KEYWORDS, keyword_pattern
 
-# --- Vertex AI Imports ---
-import vertexai
-from vertexai.generative_models import GenerativeModel
-
-# --- CrewAI Imports ---
-from crewai import Agent, Task, Crew, Process, LLM
-from crewai.tools import BaseTool
-from pydantic import BaseModel, Field
-from typing import Type
-
-# --- Import our organized tools ---
-from tools.odoo_connection import OdooConnection
-from tools.customer_tools import OdooCustomerInfoTool
-from tools.multilingual_product_tools import (
-    OdooMultilingualProductFinder, 
-    OdooMultilingualProductUpdater,
-    MultilingualProductContentGenerator
-)
+# --- Heavy Imports ---
+# Vertex AI, CrewAI, pydantic and our tools (which pull in CrewAI) are imported
+# inside the functions that use them, so the prompt appears without waiting on them
+if TYPE_CHECKING:
+    from crewai import Agent, Task, Crew
 
 load_dotenv()
 print("🇧🇪 ULTIMATE Smart AI Assistant: Vertex AI + Cost Optimization")
@@ -36,28 +38,68 @@ print("💰 Cost: Intelligent LLM routing with your paid Vertex AI account")
 print("🚀 Features: No rate limits + Smart cost optimization")
 print("=" * 75)
 
+# --- Status Logging ---
+# Per-request status lines go to stderr through one background writer thread,
+# so concurrent crews hand records to a queue instead of contending for the console
+_log_queue = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+logger = logging.getLogger("assistant")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+logger.addHandler(_queue_handler)
+# CrewAI and LiteLLM log through the same queue instead of writing synchronously
+for _library_logger in ("crewai", "LiteLLM"):
+    logging.getLogger(_library_logger).addHandler(_queue_handler)
+    logging.getLogger(_library_logger).propagate = False
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# --- Routing Labels ---
+# One shared object per label: the analyzer, router and cost monitor all pass these
+# around, so comparisons hit CPython's identity fast path and typos fail loudly
+LLM_FLASH = "flash"
+LLM_PRO = "pro"
+SIMPLE = "simple"
+COMPLEX = "complex"
+CUSTOMER_SERVICE = "customer_service"
+PRODUCT_SEARCH = "product_search"
+PRODUCT_MANAGEMENT = "product_management"
+EMAIL_COMMUNICATION = "email_communication"
+GENERAL = "general"
+
+class Route(IntEnum):
+    """Which agent/crew pair handles a request"""
+    CUSTOMER = 0
+    PRODUCT = 1
+    EMAIL = 2
+
 # --- 1. Initialize Vertex AI for Belgium ---
+@functools.lru_cache(maxsize=1)
 def initialize_vertex_ai():
     """Initialize Vertex AI with Belgium-optimized settings"""
+    import vertexai
+    from google.oauth2 import service_account
+
     try:
-        # Set credentials
+        # Set credentials (LiteLLM still resolves them from this path)
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "./google-cloud-credentials.json"
         
-        # Load project ID
-        with open("./google-cloud-credentials.json", "r") as f:
-            creds = json.load(f)
-            project_id = creds.get("project_id")
+        # Parse the key file once and hand Vertex AI a ready credentials object
+        key_info = orjson.loads(Path("./google-cloud-credentials.json").read_bytes())
+        credentials = service_account.Credentials.from_service_account_info(key_info)
+        
+        # Load project ID (the env var wins over the key file)
+        project_id = os.environ.get("GOOGLE_CLOUD_PROJECT") or key_info.get("project_id")
+        if project_id:
+            os.environ["GOOGLE_CLOUD_PROJECT"] = project_id
         
         # Initialize with working European region
-        vertexai.init(project=project_id, location="europe-west2")
+        vertexai.init(project=project_id, location="europe-west2", credentials=credentials)
         print(f"✅ Vertex AI initialized for project: {project_id}")
         print(f"🌍 Region: europe-west2 (optimal for Belgium)")
         
-        # Test connection
-        test_model = GenerativeModel("gemini-1.5-flash")
-        test_response = test_model.generate_content("Test connection from Belgium")
-        print(f"✅ Connection test successful: {test_response.text[:50]}...")
-        
+        # No test generation here: the first real request proves the connection
         return project_id
         
     except Exception as e:
@@ -65,263 +107,768 @@ def initialize_vertex_ai():
         print("💡 Make sure you've enabled Vertex AI in europe-west2 region")
         return None
 
-project_id = initialize_vertex_ai()
-if not project_id:
-    print("❌ Cannot proceed without Vertex AI. Exiting...")
-    exit()
-
-# --- 2. Establish Odoo Connection ---
-odoo_conn = OdooConnection()
-if not odoo_conn.connect():
-    print("❌ Failed to connect to Odoo. Exiting...")
-    exit()
-
-if not odoo_conn.test_connection():
-    print("❌ Odoo connection test failed. Exiting...")
-    exit()
-
-# Get connection info for tools
-conn_info = odoo_conn.get_connection_info()
-
-# --- 3. Initialize Tools with Connection ---
-customer_info_tool = OdooCustomerInfoTool(
-    models=conn_info['models'],
-    db=conn_info['db'],
-    uid=conn_info['uid'],
-    password=conn_info['password']
-)
+# --- 2. Establish Odoo Connection & 3. Initialize Tools with Connection ---
+@functools.lru_cache(maxsize=1)
+def _bootstrap() -> dict:
+    """Shared Odoo tools plus the email tool this assistant adds"""
+    from tools.multilingual_product_tools import MultilingualProductContentGenerator
 
-product_finder_tool = OdooMultilingualProductFinder(
-    models=conn_info['models'],
-    db=conn_info['db'],
-    uid=conn_info['uid'],
-    password=conn_info['password']
-)
+    return {
+        **bootstrap_tools(),
+        # Draft every language concurrently on Flash instead of inside one long Pro reply
+        'content': MultilingualProductContentGenerator(
+            model="vertex_ai/gemini-1.5-flash",
+            vertex_project=initialize_vertex_ai(),
+            vertex_location="europe-west2",
+            max_tokens=CONTENT_MAX_TOKENS,
+            client=_gemini_http_client()
+        ),
+        'email': _email_tool_cls()(),
+    }
 
-product_updater_tool = OdooMultilingualProductUpdater(
-    models=conn_info['models'],
-    db=conn_info['db'],
-    uid=conn_info['uid'],
-    password=conn_info['password']
-)
+# --- 4. Email Communication Tool ---
+_EMAIL_DRAFT_TEMPLATE = """Email Draft Request:
+To: {recipient}
+Subject: {subject}
+Language: {language}
+Context: {context}
+Status: Ready for AI composition
 
-content_generator_tool = MultilingualProductContentGenerator()
+Instructions for AI Agent:
+1. Write a professional email in {language}
+2. Address the recipient as {recipient}
+3. Use the subject: {subject}
+4. Context: {context}
+5. Include appropriate greeting and closing
+6. Maintain professional business tone
+"""
 
-# --- 4. Email Communication Tool ---
-class EmailDraftInput(BaseModel):
-    recipient: str = Field(description="The recipient of the email")
-    subject: str = Field(description="The email subject")
-    language: str = Field(description="The language for the email (English, Dutch, French)")
-    context: str = Field(description="Context or purpose of the email")
-
-class EmailDraftTool(BaseTool):
-    name: str = "Email Draft Generator"
-    description: str = "Generates professional email drafts in multiple languages"
-    args_schema: Type[BaseModel] = EmailDraftInput
-
-    def _run(self, recipient: str, subject: str, language: str, context: str) -> str:
-        print(f"\n✉️ TOOL EXECUTING: Drafting email to {recipient} in {language}...")
-        
-        result = f"Email Draft Request:\n"
-        result += f"To: {recipient}\n"
-        result += f"Subject: {subject}\n"
-        result += f"Language: {language}\n"
-        result += f"Context: {context}\n"
-        result += f"Status: Ready for AI composition\n\n"
-        
-        result += "Instructions for AI Agent:\n"
-        result += f"1. Write a professional email in {language}\n"
-        result += f"2. Address the recipient as {recipient}\n"
-        result += f"3. Use the subject: {subject}\n"
-        result += f"4. Context: {context}\n"
-        result += "5. Include appropriate greeting and closing\n"
-        result += "6. Maintain professional business tone\n"
-        
-        return result
+@functools.lru_cache(maxsize=1)
+def _email_tool_cls():
+    """Define the email tool on first use, since BaseTool drags in CrewAI"""
+    from crewai.tools import BaseTool
+    from pydantic import BaseModel, ConfigDict, Field
+    from typing import Literal, Type
+
+    class EmailDraftInput(BaseModel):
+        # Frozen, whitespace-stripped input; the Literal is validated by pydantic-core
+        model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
+        recipient: str = Field(description="The recipient of the email")
+        subject: str = Field(description="The email subject")
+        language: Literal["English", "Dutch", "French"] = Field(description="The language for the email (English, Dutch, French)")
+        context: str = Field(description="Context or purpose of the email")
 
-email_draft_tool = EmailDraftTool()
+    class EmailDraftTool(BaseTool):
+        name: str = "Email Draft Generator"
+        description: str = "Generates professional email drafts in multiple languages"
+        args_schema: Type[BaseModel] = EmailDraftInput
+
+        def _run(self, recipient: str, subject: str, language: str, context: str) -> str:
+            print(f"\n✉️ TOOL EXECUTING: Drafting email to {recipient} in {language}...")
+
+            return _EMAIL_DRAFT_TEMPLATE.format(
+                recipient=recipient,
+                subject=subject,
+                language=language,
+                context=context
+            )
+
+    return EmailDraftTool
 
 # --- 5. Vertex AI Cost-Optimized LLM Configuration ---
-print("\n--- Configuring Vertex AI Cost-Optimized LLMs ---")
-
-# Configure CrewAI to use Vertex AI with cost optimization
-try:
-    # Flash LLM for simple tasks (CHEAP & FAST)
-    crewai_flash_llm = LLM(
-        model="vertex_ai/gemini-1.5-flash",
-        vertex_ai_project=project_id,
-        vertex_ai_location="europe-west2",
-        temperature=0.3
-    )
-    
-    # Pro LLM for complex tasks (ADVANCED & BALANCED)
-    crewai_pro_llm = LLM(
-        model="vertex_ai/gemini-1.5-pro", 
-        vertex_ai_project=project_id,
-        vertex_ai_location="europe-west2",
-        temperature=0.7
-    )
-    
-    print("✅ Vertex AI Cost-Optimized LLMs configured:")
-    print("   💨 Flash LLM: vertex_ai/gemini-1.5-flash (ultra-fast & cheap)")
-    print("   ⚖️ Pro LLM: vertex_ai/gemini-1.5-pro (advanced & balanced)")
-    print("   🌍 Region: europe-west2 (Belgium optimized)")
-    print("   💰 Cost: Smart routing for optimal spending")
-    
-except Exception as e:
-    print(f"❌ Failed to configure Vertex AI LLMs: {e}")
-    exit()
+@functools.lru_cache(maxsize=1)
+def _prepare_litellm() -> str:
+    """Initialize Vertex AI and LiteLLM's stream echo once, returning the project ID"""
+    project_id = initialize_vertex_ai()
+    if not project_id:
+        print("❌ Cannot proceed without Vertex AI. Exiting...")
+        exit()
+
+    print("\n--- Configuring Vertex AI Cost-Optimized LLMs ---")
+    # Importing litellm attaches its own synchronous stderr handler; keep only the queue
+    from litellm import verbose_logger
+    verbose_logger.handlers = [_queue_handler]
+    _enable_token_streaming()
+
+    return project_id
+
+@functools.lru_cache(maxsize=1)
+def _gemini_http_client():
+    """One pooled HTTP/2 client for every LiteLLM Gemini call, passed explicitly as client="""
+    import httpx
+    from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+    # LiteLLM's vertex_ai provider ignores litellm.client_session and, without a client=,
+    # builds a fresh HTTPHandler (new TCP/TLS connection) for every sync completion.
+    # Idle connections outlive the pause while the user types the next request
+    llm_limits = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=300)
+    return HTTPHandler(client=httpx.Client(http2=True, limits=llm_limits, timeout=60))
+
+# Model, temperature, output-token ceiling and label per tier: Flash for simple tasks (CHEAP & FAST),
+# Pro for complex tasks (ADVANCED & BALANCED). Output tokens are billed, so each tier
+# only gets the budget its answers need: short lookups vs. emails and product copy
+_LLM_SETTINGS = {
+    LLM_FLASH: ("vertex_ai/gemini-1.5-flash", 0.3, 512, "💨 Flash LLM: vertex_ai/gemini-1.5-flash (ultra-fast & cheap)"),
+    LLM_PRO: ("vertex_ai/gemini-1.5-pro", 0.7, 2048, "⚖️ Pro LLM: vertex_ai/gemini-1.5-pro (advanced & balanced)"),
+}
+
+# Per-language product copy from the content generator is a few paragraphs at most
+CONTENT_MAX_TOKENS = 1024
+
+@functools.lru_cache(maxsize=None)
+def get_llm(llm_type: str):
+    """Build a tier's CrewAI LLM the first time a request is routed to it"""
+    from crewai import LLM
+
+    project_id = _prepare_litellm()
+    model, temperature, max_tokens, label = _LLM_SETTINGS[llm_type]
+
+    # Configure CrewAI to use Vertex AI with cost optimization
+    try:
+        llm = LLM(
+            model=model,
+            vertex_ai_project=project_id,
+            vertex_ai_location="europe-west2",
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            client=_gemini_http_client()
+        )
+    except Exception as e:
+        print(f"❌ Failed to configure Vertex AI LLMs: {e}")
+        exit()
+
+    print(f"✅ Vertex AI LLM configured: {label}")
+    return llm
 
 # --- 6. Advanced Cost Monitoring ---
+# Vertex AI pricing (approximate, per 1K tokens), kept as integer micro-dollars
+# so per-call accounting is plain int arithmetic with no float rounding drift
+MICROS_PER_DOLLAR = 1_000_000
+FLASH_COST_MICROS = 20_000    # $0.02 - Very cost-effective
+PRO_COST_MICROS = 80_000      # $0.08 - Standard
+
+# Cost comparison baseline (if everything used Pro)
+BASELINE_COST_MICROS = PRO_COST_MICROS
+FLASH_SAVINGS_MICROS = BASELINE_COST_MICROS - FLASH_COST_MICROS
+
+# Static summary layout, parsed once; get_summary only fills in the numbers
+_COST_SUMMARY_TEMPLATE = """
+💰 Vertex AI Cost Summary:
+   Flash LLM calls: {flash_calls} (${flash_cost:.3f})
+   Pro LLM calls: {pro_calls} (${pro_cost:.3f})
+   Total estimated: ${total_cost:.3f}
+   💸 Total savings: ${savings:.3f} ({savings_percentage:.1f}% saved)
+   
+📊 Performance Benefits:
+   ✅ No rate limits (1000+ requests/minute)
+   ✅ Production-grade reliability
+   ✅ EU data residency compliance
+   🌍 Optimized for Belgium (europe-west2)
+   💡 Smart routing saves {savings_percentage:.1f}% on costs
+   ⏳ Vertex AI queue wait: {queue_wait_seconds:.2f}s
+   ♻️ Answers served from cache: {cache_hits}
+        """
+
 class VertexAICostMonitor:
+    # Plain slot counters: tracking a call is one int increment, totals are derived on demand
+    __slots__ = ('flash_calls', 'pro_calls', 'queue_wait_seconds', 'cache_hits')
+    
     def __init__(self):
-        self.costs = {
-            'flash_calls': 0,
-            'pro_calls': 0,
-            'total_estimated_cost': 0.0,
-            'cost_savings': 0.0
-        }
-        
-        # Vertex AI pricing (approximate, per 1K tokens)
-        self.pricing = {
-            'flash': 0.02,    # Very cost-effective
-            'pro': 0.08       # Standard
-        }
-        
-        # Cost comparison baseline (if everything used Pro)
-        self.baseline_cost_per_call = 0.08
+        self.flash_calls = 0
+        self.pro_calls = 0
+        self.queue_wait_seconds = 0.0
+        self.cache_hits = 0
+    
+    @property
+    def total_calls(self):
+        return self.flash_calls + self.pro_calls
+    
+    @property
+    def total_estimated_cost(self):
+        return (self.flash_calls * FLASH_COST_MICROS + self.pro_calls * PRO_COST_MICROS) / MICROS_PER_DOLLAR
+    
+    @property
+    def cost_savings(self):
+        # Savings vs using Pro for everything
+        return self.flash_calls * FLASH_SAVINGS_MICROS / MICROS_PER_DOLLAR
     
     def track_call(self, llm_type):
-        self.costs[f'{llm_type}_calls'] += 1
-        cost = self.pricing[llm_type]
-        self.costs['total_estimated_cost'] += cost
-        
-        # Calculate savings vs using Pro for everything
-        if llm_type == 'flash':
-            savings = self.baseline_cost_per_call - cost
-            self.costs['cost_savings'] += savings
-            print(f"💰 Cost tracking: {llm_type.upper()} LLM call (${cost:.3f}) - Saved ${savings:.3f}")
+        if llm_type == LLM_FLASH:
+            self.flash_calls += 1
         else:
-            print(f"💰 Cost tracking: {llm_type.upper()} LLM call (${cost:.3f})")
+            self.pro_calls += 1
+        # Formatted only when debug logging is on; the summary carries the totals
+        logger.debug("💰 Cost tracking: %s LLM call", llm_type)
+    
+    def track_wait(self, seconds):
+        """Record time spent waiting for a free Vertex AI slot"""
+        self.queue_wait_seconds += seconds
+    
+    def track_cache_hit(self):
+        """Record a request answered from cache instead of Gemini"""
+        self.cache_hits += 1
         
     def get_summary(self):
-        total_calls = self.costs['flash_calls'] + self.costs['pro_calls']
+        total_calls = self.total_calls
         if total_calls == 0:
             return "No calls made yet."
             
-        savings_percentage = (self.costs['cost_savings'] / (total_calls * self.baseline_cost_per_call)) * 100
+        savings_percentage = self.flash_calls * FLASH_SAVINGS_MICROS * 100 / (total_calls * BASELINE_COST_MICROS)
         
-        return f"""
-💰 Vertex AI Cost Summary:
-   Flash LLM calls: {self.costs['flash_calls']} (${self.costs['flash_calls'] * self.pricing['flash']:.3f})
-   Pro LLM calls: {self.costs['pro_calls']} (${self.costs['pro_calls'] * self.pricing['pro']:.3f})
-   Total estimated: ${self.costs['total_estimated_cost']:.3f}
-   💸 Total savings: ${self.costs['cost_savings']:.3f} ({savings_percentage:.1f}% saved)
-   
-📊 Performance Benefits:
-   ✅ No rate limits (1000+ requests/minute)
-   ✅ Production-grade reliability
-   ✅ EU data residency compliance
-   🌍 Optimized for Belgium (europe-west2)
-   💡 Smart routing saves {savings_percentage:.1f}% on costs
-        """
+        return _COST_SUMMARY_TEMPLATE.format(
+            flash_calls=self.flash_calls,
+            flash_cost=self.flash_calls * FLASH_COST_MICROS / MICROS_PER_DOLLAR,
+            pro_calls=self.pro_calls,
+            pro_cost=self.pro_calls * PRO_COST_MICROS / MICROS_PER_DOLLAR,
+            total_cost=self.total_estimated_cost,
+            savings=self.cost_savings,
+            savings_percentage=savings_percentage,
+            queue_wait_seconds=self.queue_wait_seconds,
+            cache_hits=self.cache_hits,
+        )
 
 cost_monitor = VertexAICostMonitor()
 
-# --- 7. Enhanced Smart Request Analysis ---
-def analyze_request_complexity(user_request: str) -> tuple:
-    """Analyze user request and determine appropriate LLM and agent with cost optimization"""
-    request_lower = user_request.lower()
+class TokenBucket:
+    """Thread-safe token bucket: bursts pass straight through, waits only once the budget is spent"""
+    
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.tokens = float(rate_per_minute)
+        self.refill_per_second = rate_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
     
-    # Simple tasks - use Flash LLM (COST SAVINGS)
-    simple_keywords = [
-        'customer', 'who is', 'find customer', 'contact', 'email address', 'phone', 'mobile',
-        'email of', 'contact for', 'address of', 'phone of', 'mobile of', 'information about',
-        'details of', 'find', 'search for', 'look up', 'brico', 'company', 'client',
-        'partner', 'supplier', 'vendor', 'contact details', 'customer info'
-    ]
+    def acquire(self, tokens=1):
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.refill_per_second
+            time.sleep(wait)
+
+# Bound concurrent Vertex AI work: each kickoff fans out into several Gemini calls,
+# so cap in-flight crews to stay under per-minute quotas and keep peak memory flat
+VERTEX_MAX_CONCURRENT = int(os.getenv("VERTEX_MAX_CONCURRENT", "4"))
+VERTEX_MAX_RPM = int(os.getenv("VERTEX_MAX_RPM", "60"))
+_vertex_slots = threading.BoundedSemaphore(VERTEX_MAX_CONCURRENT)
+_vertex_rate_limiter = TokenBucket(VERTEX_MAX_RPM)
+
+# Blocking work handed off by the event loop (Odoo lookups, crew kickoffs, embedding calls)
+# runs on one bounded pool of reused worker threads
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=VERTEX_MAX_CONCURRENT + 4, thread_name_prefix="assistant-worker")
+
+# Quota errors (HTTP 429) are retried with exponential backoff instead of failing the turn
+VERTEX_MAX_RETRIES = int(os.getenv("VERTEX_MAX_RETRIES", "3"))
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Vertex AI reports exhausted quota as HTTP 429 / RESOURCE_EXHAUSTED"""
+    return getattr(error, 'status_code', None) == 429 or 'RESOURCE_EXHAUSTED' in str(error)
+
+def kickoff_with_limit(crew: "Crew", tokens=1):
+    """Run a crew while holding one of the bounded Vertex AI slots"""
+    for attempt in range(VERTEX_MAX_RETRIES + 1):
+        wait_started = time.monotonic()
+        _vertex_rate_limiter.acquire(tokens)
+        with _vertex_slots:
+            cost_monitor.track_wait(time.monotonic() - wait_started)
+            try:
+                return crew.kickoff()
+            except Exception as e:
+                if attempt == VERTEX_MAX_RETRIES or not _is_rate_limited(e):
+                    raise
+        # Back off outside the slot so other crews can keep running meanwhile
+        backoff = min(60, 2 ** (attempt + 1)) + random.random()
+        logger.warning("⏳ Vertex AI rate limit hit, retrying in %.1fs (%d/%d)...", backoff, attempt + 1, VERTEX_MAX_RETRIES)
+        time.sleep(backoff)
+
+# Interactive turns print Gemini tokens as they arrive; batch runs never set the flag,
+# so their concurrent tasks keep buffering into their own outputs instead of interleaving
+_stream_to_console = threading.Event()
+# Agent steps stream their ReAct reasoning too; only text after this marker is the answer
+_FINAL_ANSWER_MARKER = "Final Answer:"
+_stream_state = {'chunks': 0, 'pending': '', 'answering': False}
+
+@functools.lru_cache(maxsize=1)
+def _enable_token_streaming():
+    """Subscribe once to CrewAI's LLM stream events and echo the final answer to the console"""
+    from crewai.utilities.events import crewai_event_bus
+    from crewai.utilities.events.llm_events import LLMCallStartedEvent, LLMStreamChunkEvent
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def _reset_answer(source, event):
+        # Every agent step is a new LLM call: hide its output until it starts a final answer
+        _stream_state['pending'] = ''
+        _stream_state['answering'] = False
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _print_chunk(source, event):
+        if not _stream_to_console.is_set():
+            return
+        if _stream_state['answering']:
+            text = event.chunk
+        else:
+            # The marker may arrive split across chunks, so look for it in everything buffered so far
+            pending = _stream_state['pending'] + event.chunk
+            marker_at = pending.find(_FINAL_ANSWER_MARKER)
+            if marker_at == -1:
+                _stream_state['pending'] = pending
+                return
+            _stream_state['answering'] = True
+            text = pending[marker_at + len(_FINAL_ANSWER_MARKER):].lstrip()
+        if text:
+            _stream_state['chunks'] += 1
+            print(text, end='', flush=True)
+
+def kickoff_streaming(crew: "Crew"):
+    """Run an interactive crew, streaming its final answer instead of printing it at the end"""
+    print("\n" + "="*60)
+    print("📡 Streaming your result:")
+    print("="*60)
+    _stream_state.update(chunks=0, pending='', answering=False)
+    _stream_to_console.set()
+    try:
+        result = kickoff_with_limit(crew)
+    finally:
+        _stream_to_console.clear()
+    if _stream_state['chunks'] == 0:
+        # Nothing of the answer was streamed (e.g. provider fell back to a buffered reply)
+        print(result.raw)
+    else:
+        print()
+    print("="*60)
+    return result
+
+# Read-only answers (customer/product lookups) are cached so repeated questions skip the LLM
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "600"))
+_response_cache = TTLCache(maxsize=512, ttl=RESPONSE_CACHE_TTL)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _normalize_request(user_request: str) -> str:
+    """Collapse case and whitespace so trivially different phrasings share a cache entry"""
+    return _WHITESPACE_RE.sub(' ', user_request.strip().lower())
+
+# Optional semantic layer: reworded lookups ("email of Brico" / "what is the email for Brico")
+# reuse a stored answer when their embeddings are close enough. Off by default because
+# every miss costs one embedding call. Requests about different customers or products can
+# embed above the threshold ("email of Brico Boncelles" / "email of Brico Liège"), so the
+# layer only handles requests whose subject can be extracted, and a hit needs the same one
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+
+class SemanticResponseCache:
+    """Cosine-similarity lookup over embeddings of recently answered requests"""
+    
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, maxsize=256, ttl=RESPONSE_CACHE_TTL):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.entries = deque(maxlen=maxsize)  # (stored_at, request_type, subject, unit vector, response)
+        self._lock = threading.Lock()
+        self._model = None
+    
+    def embed_many(self, texts):
+        """Embed texts in as few calls as possible (the endpoint takes up to 250 per request)"""
+        import numpy as np
+        if self._model is None:
+            from vertexai.language_models import TextEmbeddingModel
+            self._model = TextEmbeddingModel.from_pretrained("text-embedding-004")
+        values = []
+        for start in range(0, len(texts), 250):
+            values.extend(embedding.values for embedding in self._model.get_embeddings(texts[start:start + 250]))
+        vectors = np.asarray(values, dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    def lookup_many(self, queries):
+        """For (request_type, text) pairs return (cached response or None, embedding) each
+
+        Requests without an extractable subject are neither embedded nor served (embedding None)
+        """
+        import numpy as np
+        results = [(None, None)] * len(queries)
+        subjects = [_request_subject(text) for _, text in queries]
+        pinned = [i for i, subject in enumerate(subjects) if subject is not None]
+        if not pinned:
+            return results
+        try:
+            vectors = self.embed_many([queries[i][1] for i in pinned])
+        except Exception as e:
+            # The semantic layer is an optimisation; never fail the request over it
+            logger.warning("⚠️ Semantic cache unavailable: %s", e)
+            return results
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            live = [entry for entry in self.entries if entry[0] >= cutoff]
+        for i, vector in zip(pinned, vectors):
+            request_type, subject = queries[i][0], subjects[i]
+            results[i] = (None, vector)
+            candidates = [entry for entry in live if entry[1] == request_type and entry[2] == subject]
+            if candidates:
+                scores = np.stack([entry[3] for entry in candidates]) @ vector
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    results[i] = (candidates[best][4], vector)
+        return results
     
-    # Complex tasks - use Pro LLM (QUALITY FOCUS)
-    complex_keywords = [
-        'update product', 'draft email', 'write email', 'create', 'generate', 'analyze', 
-        'polish', 'improve', 'enhance', 'compose', 'multilingual', 'translate'
-    ]
+    def lookup(self, request_type, text):
+        """Return (cached response or None, embedding to store the fresh answer under)"""
+        return self.lookup_many([(request_type, text)])[0]
     
-    # Email/Communication keywords - always use Pro LLM
-    email_keywords = ['draft email', 'write email', 'send email', 'compose', 'letter', 'message']
+    def forget(self, request_type):
+        with self._lock:
+            live = [entry for entry in self.entries if entry[1] != request_type]
+            self.entries.clear()
+            self.entries.extend(live)
     
-    # Product management keywords - use Pro LLM for quality
-    product_keywords = ['product', 'item', 'inventory', 'stock', 'catalog', 'price', 'description']
+    def store(self, request_type, text, vector, response):
+        subject = _request_subject(text)
+        if subject is None:
+            return
+        with self._lock:
+            self.entries.append((time.monotonic(), request_type, subject, vector, response))
+
+_semantic_cache = SemanticResponseCache() if SEMANTIC_CACHE_ENABLED else None
+
+def _forget_product_answers():
+    """Drop cached product lookups once the product crew may have rewritten descriptions"""
+    for key in [key for key in list(_response_cache) if key[0] == PRODUCT_SEARCH]:
+        _response_cache.pop(key, None)
+    if _semantic_cache is not None:
+        _semantic_cache.forget(PRODUCT_SEARCH)
+
+# --- 7. Enhanced Smart Request Analysis ---
+# Simple tasks - use Flash LLM (COST SAVINGS)
+SIMPLE_KEYWORDS = CUSTOMER_KEYWORDS
+
+# Complex tasks - use Pro LLM (QUALITY FOCUS)
+COMPLEX_KEYWORDS = (
+    'update product', 'draft email', 'write email', 'create', 'generate', 'analyze', 
+    'polish', 'improve', 'enhance', 'compose', 'multilingual', 'translate'
+)
+
+# Email/Communication keywords - always use Pro LLM
+EMAIL_KEYWORDS = ('draft email', 'write email', 'send email', 'compose', 'letter', 'message')
+
+# Product management keywords - use Pro LLM for quality
+PRODUCT_KEYWORDS = ('product', 'item', 'inventory', 'stock', 'catalog', 'price', 'description')
+
+# Words that turn a product search into a product update
+PRODUCT_UPDATE_WORDS = ('update', 'modify', 'change', 'edit')
+
+# Compiled once at import: one C-level scan per category instead of a Python loop per keyword
+_SIMPLE_RE = keyword_pattern(SIMPLE_KEYWORDS)
+_COMPLEX_RE = keyword_pattern(COMPLEX_KEYWORDS)
+_EMAIL_RE = keyword_pattern(EMAIL_KEYWORDS)
+_PRODUCT_RE = keyword_pattern(PRODUCT_KEYWORDS)
+_PRODUCT_UPDATE_RE = keyword_pattern(PRODUCT_UPDATE_WORDS)
+
+# Opening words that settle the route without scanning the whole request.
+# Only single-word keywords of the highest-priority tiers qualify, so the
+# shortcut always agrees with the full keyword scan below
+_FIRST_WORD_EMAIL = frozenset(word for word in EMAIL_KEYWORDS if ' ' not in word)
+_FIRST_WORD_COMPLEX = frozenset(word for word in COMPLEX_KEYWORDS if ' ' not in word)
+
+def analyze_request_complexity(user_request: str) -> tuple:
+    """Analyze user request and determine appropriate LLM and agent with cost optimization"""
+    # Fast path: "compose ...", "translate ...", "polish ..." route on their first word
+    words = user_request.split(None, 1)
+    first_word = words[0].lower() if words else ''
+    if first_word in _FIRST_WORD_EMAIL:
+        return COMPLEX, EMAIL_COMMUNICATION
+    if first_word in _FIRST_WORD_COMPLEX and not _EMAIL_RE.search(user_request):
+        return COMPLEX, PRODUCT_MANAGEMENT
     
     # Determine complexity and route intelligently
-    if any(keyword in request_lower for keyword in email_keywords):
-        return "complex", "email_communication"
-    elif any(keyword in request_lower for keyword in complex_keywords):
-        return "complex", "product_management"
-    elif any(keyword in request_lower for keyword in product_keywords):
+    if _EMAIL_RE.search(user_request):
+        return COMPLEX, EMAIL_COMMUNICATION
+    elif _COMPLEX_RE.search(user_request):
+        return COMPLEX, PRODUCT_MANAGEMENT
+    elif _PRODUCT_RE.search(user_request):
         # Product searches can be simple, but updates are complex
-        if any(word in request_lower for word in ['update', 'modify', 'change', 'edit']):
-            return "complex", "product_management"
+        if _PRODUCT_UPDATE_RE.search(user_request):
+            return COMPLEX, PRODUCT_MANAGEMENT
         else:
-            return "simple", "product_search"
-    elif any(keyword in request_lower for keyword in simple_keywords):
-        return "simple", "customer_service"
+            return SIMPLE, PRODUCT_SEARCH
+    elif _SIMPLE_RE.search(user_request):
+        return SIMPLE, CUSTOMER_SERVICE
     else:
         # Default to simple for ambiguous queries (cost optimization)
-        return "simple", "general"
+        return SIMPLE, GENERAL
 
-# --- 8. Cost-Optimized Vertex AI Agents ---
-print("\n--- Assembling Cost-Optimized Vertex AI Workforce ---")
-
-# Simple tasks agent (Flash LLM - COST OPTIMIZED)
-customer_agent_flash = Agent(
-    role='Odoo Customer Service Specialist (Fast & Efficient)',
-    goal='Search the Odoo database to find customer contact details and order history efficiently with minimal cost.',
-    backstory="""You are an expert Odoo database assistant specializing in customer information retrieval. 
-    Your primary job is to search the Odoo database using the available tools to find customer information quickly and cost-effectively.
-    
-    IMPORTANT: Always use the Odoo Customer Info Finder tool when users ask about customers, companies, contacts, or contact information.
-    You have access to a live Odoo database and should search it first before saying information is not available.""",
-    tools=[customer_info_tool],
-    llm=crewai_flash_llm,
-    verbose=True,
-    max_iter=2,
-    memory=False
+# Plain "who is X" / "find customer X" lookups name the customer outright; no LLM needed
+_CUSTOMER_NAME_RE = re.compile(
+    r"^\s*(?:who\s+is|find|look\s+up|search\s+for"
+    r"|(?:give\s+me\s+)?(?:information|details|contact\s+details)\s+(?:about|of|for)"
+    r"|(?:email|phone|mobile|address|contact)\s+(?:of|for))"
+    r"\s+(?:the\s+)?(?:customer\s+|client\s+)?(?P<name>.+?)\s*[?!.]*\s*$",
+    re.IGNORECASE
 )
 
-# Complex tasks agents (Pro LLM - QUALITY FOCUSED)
-product_agent_pro = Agent(
-    role='Odoo Product Management Specialist (Advanced)',
-    goal='Handle complex product updates and multilingual content generation using Odoo tools with high quality.',
-    backstory="""You are an expert in product management with advanced content creation capabilities.
-    You have access to Odoo product tools and can search, update, and generate content for products.
-    Always use the available Odoo tools to provide accurate, up-to-date information with professional quality.""",
-    tools=[product_finder_tool, product_updater_tool, content_generator_tool],
-    llm=crewai_pro_llm,
-    verbose=True,
-    max_iter=3,
-    memory=False
-)
+def _requested_customer(user_request: str):
+    """The customer a plain lookup names, or None when the request doesn't follow that shape"""
+    match = _CUSTOMER_NAME_RE.match(user_request)
+    return match.group('name') if match else None
 
-email_agent_pro = Agent(
-    role='Professional Email Communication Specialist (Expert)',
-    goal='Draft high-quality professional emails in multiple languages with advanced language skills.',
-    backstory="""You are an expert in business communication with advanced language skills.
-    You can create professional emails in English, Dutch, and French with appropriate tone and formatting.
-    Focus on creating polished, professional communication that represents the business well.""",
-    tools=[email_draft_tool],
-    llm=crewai_pro_llm,
-    verbose=True,
-    max_iter=2,
-    memory=False
+# "... of/for/about X" names the subject anywhere in the request ("what is the email of Brico Liège")
+_REQUEST_SUBJECT_RE = re.compile(
+    r"\b(?:of|for|about|named|called)\s+(?:the\s+)?(?:(?:customer|client|product|item)\s+)?"
+    r"(?P<name>.+?)\s*[?!.]*\s*$",
+    re.IGNORECASE
 )
 
-print("✅ Cost-Optimized Vertex AI workforce ready:")
-print("   💨 Flash Agent: Customer lookups & simple queries (70% cost savings)")
-print("   ⚖️ Pro Agents: Product management & email drafting (premium quality)")
+def _request_subject(user_request: str):
+    """The customer or product a lookup is about, or None when it can't be pinned down"""
+    match = _CUSTOMER_NAME_RE.match(user_request) or _REQUEST_SUBJECT_RE.search(user_request)
+    return match.group('name') if match else None
+
+def direct_customer_lookup(user_request: str):
+    """Answer a plain customer lookup straight from Odoo; returns None to fall back to the agent"""
+    customer = _requested_customer(user_request)
+    if customer is None:
+        return None
+    
+    result = _bootstrap()['customer']._run(customer)
+    # Only trust the shortcut when the tool actually found the customer
+    if result.startswith(("Customer Information:", "Customer:")):
+        return result
+    return None
+
+# --- 8. Cost-Optimized Vertex AI Agents ---
+# Agent and crew verbosity is opt-in so the console stays readable
+CREW_VERBOSE = os.getenv("ASSISTANT_VERBOSE", "0") == "1"
+
+def _crew_for(agent) -> "Crew":
+    """Reusable single-agent crew; each turn only swaps in its task"""
+    from crewai import Crew, Process
+
+    return Crew(
+        agents=[agent],
+        tasks=[],
+        process=Process.sequential,
+        verbose=CREW_VERBOSE
+    )
+
+# Agents are built per route on first use, so sessions that only look up
+# customers never construct the Pro LLM or its agents
+@functools.lru_cache(maxsize=1)
+def _customer_workforce() -> tuple:
+    """Flash agent for simple tasks (COST OPTIMIZED)"""
+    from crewai import Agent
+
+    customer_agent_flash = Agent(
+        role='Odoo Customer Service Specialist (Fast & Efficient)',
+        goal='Search the Odoo database to find customer contact details and order history efficiently with minimal cost.',
+        backstory="""You are an expert Odoo database assistant specializing in customer information retrieval. 
+        Your primary job is to search the Odoo database using the available tools to find customer information quickly and cost-effectively.
+        
+        IMPORTANT: Always use the Odoo Customer Info Finder tool when users ask about customers, companies, contacts, or contact information.
+        You have access to a live Odoo database and should search it first before saying information is not available.""",
+        tools=[_bootstrap()['customer']],
+        llm=get_llm(LLM_FLASH),
+        verbose=CREW_VERBOSE,
+        max_iter=2,
+        memory=False
+    )
+    
+    print("✅ Flash Agent ready: Customer lookups & simple queries (70% cost savings)")
+    return customer_agent_flash, _crew_for(customer_agent_flash)
+
+@functools.lru_cache(maxsize=1)
+def _product_workforce() -> tuple:
+    """Pro agent for product management (QUALITY FOCUSED)"""
+    from crewai import Agent
+
+    tools = _bootstrap()
+    product_agent_pro = Agent(
+        role='Odoo Product Management Specialist (Advanced)',
+        goal='Handle complex product updates and multilingual content generation using Odoo tools with high quality.',
+        backstory="""You are an expert in product management with advanced content creation capabilities.
+        You have access to Odoo product tools and can search, update, and generate content for products.
+        Always use the available Odoo tools to provide accurate, up-to-date information with professional quality.""",
+        tools=[tools['finder'], tools['updater'], tools['content']],
+        llm=get_llm(LLM_PRO),
+        verbose=CREW_VERBOSE,
+        max_iter=3,
+        memory=False
+    )
+    
+    print("✅ Pro Agent ready: Product management (premium quality)")
+    return product_agent_pro, _crew_for(product_agent_pro)
+
+@functools.lru_cache(maxsize=1)
+def _email_workforce() -> tuple:
+    """Pro agent for email drafting (QUALITY FOCUSED)"""
+    from crewai import Agent
+
+    email_agent_pro = Agent(
+        role='Professional Email Communication Specialist (Expert)',
+        goal='Draft high-quality professional emails in multiple languages with advanced language skills.',
+        backstory="""You are an expert in business communication with advanced language skills.
+        You can create professional emails in English, Dutch, and French with appropriate tone and formatting.
+        Focus on creating polished, professional communication that represents the business well.""",
+        tools=[_bootstrap()['email']],
+        llm=get_llm(LLM_PRO),
+        verbose=CREW_VERBOSE,
+        max_iter=2,
+        memory=False
+    )
+    
+    print("✅ Pro Agent ready: Email drafting (premium quality)")
+    return email_agent_pro, _crew_for(email_agent_pro)
+
+_WORKFORCE = {
+    Route.CUSTOMER: _customer_workforce,
+    Route.PRODUCT: _product_workforce,
+    Route.EMAIL: _email_workforce,
+}
+
+def get_workforce(route: Route) -> tuple:
+    """Return the (agent, crew) pair for a route, building it if needed"""
+    return _WORKFORCE[route]()
+
+# --- 9. Task Building & Batch Execution ---
+def _route_for(complexity: str, request_type: str) -> Route:
+    """Map an analysis result onto the workforce entry that handles it"""
+    if complexity == SIMPLE:
+        return Route.CUSTOMER
+    return Route.EMAIL if request_type == EMAIL_COMMUNICATION else Route.PRODUCT
+
+# Task wording is fixed per route; only the quoted request changes between turns
+_EMAIL_TASK_TMPL = "Handle this email request professionally: '{req}'. Create high-quality, well-structured communication with proper formatting and tone."
+_EMAIL_TASK_OUTPUT = "Professional email draft with proper formatting, tone, and language"
+
+_PRODUCT_TASK_TMPL = """Handle this product management request: '{req}'.
+            
+            Use the available Odoo tools to:
+            1. Search for products if needed
+            2. Generate compelling multilingual content if requested
+            3. Update product information if requested
+            4. Provide detailed product information
+            
+            Focus on quality, engaging descriptions and multilingual content."""
+_PRODUCT_TASK_OUTPUT = "Complete product management results with multilingual content and professional quality"
+
+_GENERAL_TASK_TMPL = """You are an Odoo database assistant. Handle this request efficiently: '{req}'
+        
+        IMPORTANT: If this is about customer information, use the Odoo Customer Info Finder tool to search the database.
+        If this is about product information, use the appropriate tools to search for products.
+        
+        Provide clear, direct results without unnecessary elaboration."""
+_GENERAL_TASK_OUTPUT = "Clear, direct response to the user's request with relevant information from Odoo"
+
+_TASK_TEMPLATES = {
+    EMAIL_COMMUNICATION: (_EMAIL_TASK_TMPL, _EMAIL_TASK_OUTPUT),
+    PRODUCT_MANAGEMENT: (_PRODUCT_TASK_TMPL, _PRODUCT_TASK_OUTPUT),
+}
+
+def _build_task(user_request: str, request_type: str, agent: "Agent", **task_options) -> "Task":
+    """Create the CrewAI task for a routed request"""
+    from crewai import Task
+
+    template, expected_output = _TASK_TEMPLATES.get(request_type, (_GENERAL_TASK_TMPL, _GENERAL_TASK_OUTPUT))
+    return Task(
+        description=template.format(req=user_request),
+        expected_output=expected_output,
+        agent=agent,
+        **task_options
+    )
+
+def _cached_batch_answers(user_requests: list, analyses: list) -> tuple:
+    """Answer queued simple requests from the caches, embedding all misses in one call"""
+    answers, vectors = {}, {}
+    simple = [i for i, (complexity, _) in enumerate(analyses) if complexity == SIMPLE]
+    for i in simple:
+        cached = _response_cache.get((analyses[i][1], _normalize_request(user_requests[i])))
+        if cached is not None:
+            answers[i] = cached
+    misses = [i for i in simple if i not in answers]
+    if _semantic_cache is not None and misses:
+        queries = [(analyses[i][1], _normalize_request(user_requests[i])) for i in misses]
+        for i, (cached, vector) in zip(misses, _semantic_cache.lookup_many(queries)):
+            if cached is not None:
+                answers[i] = cached
+            elif vector is not None:
+                vectors[i] = vector
+    return answers, vectors
+
+def run_batch(user_requests: list):
+    """Run queued requests as one crew so CrewAI can overlap their Gemini calls"""
+    from crewai import Crew, Process
+
+    analyses = [analyze_request_complexity(user_request) for user_request in user_requests]
+    answers, vectors = _cached_batch_answers(user_requests, analyses)
+    for _ in answers:
+        cost_monitor.track_cache_hit()
+    
+    agents, tasks, task_indexes = [], [], []
+    for i, (user_request, (complexity, request_type)) in enumerate(zip(user_requests, analyses)):
+        if i in answers:
+            continue
+        cost_monitor.track_call(LLM_FLASH if complexity == SIMPLE else LLM_PRO)
+        
+        # Each task gets a private agent copy so parallel tasks never share an executor
+        agent = get_workforce(_route_for(complexity, request_type))[0].copy()
+        agents.append(agent)
+        # context=[] keeps the requests independent instead of chaining earlier outputs
+        tasks.append(_build_task(user_request, request_type, agent, async_execution=True, context=[]))
+        task_indexes.append(i)
+    
+    if tasks:
+        # CrewAI requires a crew to end with at most one asynchronous task
+        tasks[-1].async_execution = False
+        
+        batch_crew = Crew(
+            agents=agents,
+            tasks=tasks,
+            process=Process.sequential,
+            verbose=CREW_VERBOSE
+        )
+        
+        # A product update anywhere in the batch makes product lookups (cached or from this batch) stale
+        updates_products = any(_route_for(*analyses[i]) is Route.PRODUCT for i in task_indexes)
+        logger.info("📦 Running %d queued requests as one batch (%d from cache)...", len(tasks), len(answers))
+        try:
+            result = kickoff_with_limit(batch_crew, tokens=len(tasks))
+        finally:
+            if updates_products:
+                _forget_product_answers()
+        for i, task_output in zip(task_indexes, result.tasks_output):
+            answers[i] = task_output.raw
+            complexity, request_type = analyses[i]
+            if complexity == SIMPLE and not (updates_products and request_type == PRODUCT_SEARCH):
+                _response_cache[(request_type, _normalize_request(user_requests[i]))] = task_output.raw
+                if i in vectors:
+                    _semantic_cache.store(request_type, _normalize_request(user_requests[i]), vectors[i], task_output.raw)
+    
+    for i, user_request in enumerate(user_requests):
+        print("\n" + "="*60)
+        print(f"✅ BATCH RESULT for: '{user_request}'")
+        print("="*60)
+        print(answers[i])
+    print("="*60)
+
+# --- 10. Main Application Loop ---
+_ROUTE_ERROR_LABELS = {
+    Route.CUSTOMER: "Simple task error",
+    Route.PRODUCT: "Product management error",
+    Route.EMAIL: "Email service error",
+}
+
+def _discard_outcome(task: asyncio.Task):
+    """Done-callback for abandoned tasks: retrieve the exception so asyncio doesn't report it"""
+    if not task.cancelled():
+        task.exception()
+
+async def main():
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import FileHistory
 
-# --- 9. Main Application Loop ---
-def main():
     print("\n🎉 Welcome to your ULTIMATE Smart AI Assistant!")
     print("🇧🇪 Vertex AI + Cost Optimization - Belgium Edition")
     print("💡 Features:")
@@ -331,139 +878,161 @@ def main():
     print("   • 🌍 EU data residency compliance")
     print("   • 💰 Intelligent cost optimization with your paid account")
     print("   • 📊 Real-time cost monitoring and savings tracking")
+    print("   • 📦 Batch mode: ':queue <request>' to collect, ':run' to process together")
     
-    while True:
-        try:
-            user_request = input("\n🤖 What can I help you with? (or 'exit'): ").strip()
-            if user_request.lower() in ["exit", "quit"]:
-                print("👋 Goodbye!")
-                print(cost_monitor.get_summary())
-                break
-            if not user_request:
-                print("⚠️ Please enter your request.")
-                continue
+    # Connect and assemble everything on first use rather than at import time
+    # asyncio.to_thread() below uses the loop's default executor: make that our shared pool
+    asyncio.get_running_loop().set_default_executor(TOOL_EXECUTOR)
+    
+    # Odoo login and Vertex AI setup are independent round trips, so overlap them
+    await asyncio.gather(
+        asyncio.to_thread(bootstrap_tools),
+        asyncio.to_thread(get_llm, LLM_FLASH)
+    )
+    
+    # Only the default customer path is built up front; Pro agents wait until needed
+    customer_agent_flash, customer_crew = await asyncio.to_thread(get_workforce, Route.CUSTOMER)
+    queued_requests = []
+    # prompt_async waits for input without blocking the event loop; earlier
+    # requests stay available with the arrow keys across sessions
+    session = PromptSession(history=FileHistory(".assistant_history"))
+    
+    # The summary is printed however the session ends; task cancellation still propagates
+    try:
+        while True:
+            try:
+                user_request = (await session.prompt_async("\n🤖 What can I help you with? (or 'exit'): ")).strip()
+                if user_request.lower() in ("exit", "quit"):
+                    print("👋 Goodbye!")
+                    break
+                if not user_request:
+                    print("⚠️ Please enter your request.")
+                    continue
+
+                # Batch mode: collect requests now, run them together later
+                if user_request.startswith(":queue"):
+                    queued = user_request[len(":queue"):].strip()
+                    if queued:
+                        queued_requests.append(queued)
+                        print(f"📥 Queued ({len(queued_requests)} waiting). Type ':run' to process the batch.")
+                    else:
+                        print("⚠️ Usage: :queue <request>")
+                    continue
+                if user_request == ":run":
+                    if not queued_requests:
+                        print("⚠️ Nothing queued yet. Use ':queue <request>' first.")
+                        continue
+                    try:
+                        await asyncio.to_thread(run_batch, queued_requests)
+                    except Exception as e:
+                        print(f"❌ Batch error: {e}")
+                    queued_requests.clear()
+                    continue
 
-            print(f"\n🎯 Processing your request: '{user_request}'")
+                logger.info("🎯 Processing your request: '%s'", user_request)
             
-            # Analyze request complexity and route appropriately
-            complexity, request_type = analyze_request_complexity(user_request)
+                # Analyze request complexity and route appropriately
+                complexity, request_type = analyze_request_complexity(user_request)
             
-            print(f"🧠 Request analysis:")
-            print(f"   Complexity: {complexity}")
-            print(f"   Type: {request_type}")
-            print(f"   Region: europe-west2 (Belgium optimized)")
+                logger.info("🧠 Request analysis: complexity=%s, type=%s, region=europe-west2", complexity, request_type)
             
-            # Route to appropriate agent and LLM using CrewAI
-            if complexity == "simple":
-                print("⚡ Routing to FLASH LLM (ultra-fast & 70% cost savings)")
-                cost_monitor.track_call('flash')
+                # Route to appropriate agent and LLM using CrewAI
+                route = _route_for(complexity, request_type)
+                match route:
+                    case Route.CUSTOMER:
+                        # Simple requests are read-only lookups, so a recent answer can be reused
+                        cache_key = (request_type, _normalize_request(user_request))
+                        cached_result = _response_cache.get(cache_key)
+                        semantic_vector = None
+                        direct_lookup = None
+                        if cached_result is None:
+                            # The Odoo lookup and the embedding call are independent round-trips, so overlap them
+                            if request_type == CUSTOMER_SERVICE:
+                                direct_lookup = asyncio.create_task(asyncio.to_thread(direct_customer_lookup, user_request))
+                            if _semantic_cache is not None:
+                                cached_result, semantic_vector = await asyncio.to_thread(_semantic_cache.lookup, request_type, cache_key[1])
+                        if cached_result is not None:
+                            if direct_lookup is not None:
+                                # The Odoo read still finishes on its worker; just never leave its outcome unretrieved
+                                direct_lookup.cancel()
+                                direct_lookup.add_done_callback(_discard_outcome)
+                            logger.info("♻️ Served from response cache (no LLM call)")
+                            cost_monitor.track_cache_hit()
+                            print("\n" + "="*60)
+                            print("✅ TASK COMPLETE! Here's your result:")
+                            print("="*60)
+                            print(cached_result)
+                            print("="*60)
+                            continue
                 
-                # Create task for simple requests
-                simple_task = Task(
-                    description=f"""You are an Odoo database assistant. Handle this request efficiently: '{user_request}'
-                    
-                    IMPORTANT: If this is about customer information, use the Odoo Customer Info Finder tool to search the database.
-                    If this is about product information, use the appropriate tools to search for products.
-                    
-                    Provide clear, direct results without unnecessary elaboration.""",
-                    expected_output="Clear, direct response to the user's request with relevant information from Odoo",
-                    agent=customer_agent_flash
-                )
+                        # Fast path: named customer lookups go straight to the Odoo tool
+                        if direct_lookup is not None:
+                            direct_result = await direct_lookup
+                            if direct_result is not None:
+                                logger.info("⚡ Direct Odoo lookup (no LLM call needed)")
+                                _response_cache[cache_key] = direct_result
+                                print("\n" + "="*60)
+                                print("✅ TASK COMPLETE! Here's your result:")
+                                print("="*60)
+                                print(direct_result)
+                                print("="*60)
+                                continue
                 
-                # Create and run crew
-                simple_crew = Crew(
-                    agents=[customer_agent_flash],
-                    tasks=[simple_task],
-                    process=Process.sequential,
-                    verbose=True
-                )
+                        logger.info("⚡ Routing to FLASH LLM (ultra-fast & 70% cost savings)")
+                        cost_monitor.track_call(LLM_FLASH)
                 
-                try:
-                    result = simple_crew.kickoff()
-                    print("\n" + "="*60)
-                    print("✅ TASK COMPLETE! Here's your result:")
-                    print("="*60)
-                    print(result)
-                    print("="*60)
-                except Exception as e:
-                    print(f"❌ Simple task error: {e}")
-                    continue
+                        # Create task for simple requests
+                        simple_task = _build_task(user_request, request_type, customer_agent_flash)
                 
-            else:  # complex tasks
-                print("⚖️ Routing to PRO LLM (premium quality & advanced features)")
-                cost_monitor.track_call('pro')
+                        # Reuse the persistent crew with this turn's task
+                        customer_crew.tasks = [simple_task]
                 
-                if request_type == "email_communication":
-                    email_task = Task(
-                        description=f"Handle this email request professionally: '{user_request}'. Create high-quality, well-structured communication with proper formatting and tone.",
-                        expected_output="Professional email draft with proper formatting, tone, and language",
-                        agent=email_agent_pro
-                    )
-                    
-                    email_crew = Crew(
-                        agents=[email_agent_pro],
-                        tasks=[email_task],
-                        process=Process.sequential,
-                        verbose=True
-                    )
-                    
-                    try:
-                        result = email_crew.kickoff()
-                        print("\n" + "="*60)
-                        print("✅ TASK COMPLETE! Here's your result:")
-                        print("="*60)
-                        print(result)
-                        print("="*60)
-                    except Exception as e:
-                        print(f"❌ Email service error: {e}")
-                        continue
-                        
-                elif request_type == "product_management":
-                    product_task = Task(
-                        description=f"""Handle this product management request: '{user_request}'.
-                        
-                        Use the available Odoo tools to:
-                        1. Search for products if needed
-                        2. Generate compelling multilingual content if requested
-                        3. Update product information if requested
-                        4. Provide detailed product information
-                        
-                        Focus on quality, engaging descriptions and multilingual content.""",
-                        expected_output="Complete product management results with multilingual content and professional quality",
-                        agent=product_agent_pro
-                    )
-                    
-                    product_crew = Crew(
-                        agents=[product_agent_pro],
-                        tasks=[product_task],
-                        process=Process.sequential,
-                        verbose=True
-                    )
-                    
-                    try:
-                        result = product_crew.kickoff()
-                        print("\n" + "="*60)
-                        print("✅ TASK COMPLETE! Here's your result:")
-                        print("="*60)
-                        print(result)
-                        print("="*60)
-                    except Exception as e:
-                        print(f"❌ Product management error: {e}")
-                        continue
+                        try:
+                            result = await asyncio.to_thread(kickoff_streaming, customer_crew)
+                            _response_cache[cache_key] = result.raw
+                            if semantic_vector is not None:
+                                _semantic_cache.store(request_type, cache_key[1], semantic_vector, result.raw)
+                        except Exception as e:
+                            print(f"❌ {_ROUTE_ERROR_LABELS[route]}: {e}")
+                            continue
+                
+                    case Route.EMAIL | Route.PRODUCT:  # complex tasks
+                        logger.info("⚖️ Routing to PRO LLM (premium quality & advanced features)")
+                        cost_monitor.track_call(LLM_PRO)
+                
+                        # The route's agent and crew are built once and reused; only the task is new
+                        pro_agent, pro_crew = await asyncio.to_thread(get_workforce, route)
+                        pro_crew.tasks = [_build_task(user_request, request_type, pro_agent)]
+                
+                        try:
+                            await asyncio.to_thread(kickoff_streaming, pro_crew)
+                        except Exception as e:
+                            print(f"❌ {_ROUTE_ERROR_LABELS[route]}: {e}")
+                            continue
+                        finally:
+                            # Even a failed run may have written some descriptions
+                            if route is Route.PRODUCT:
+                                _forget_product_answers()
 
-            # Show cost summary every 3 requests
-            total_calls = cost_monitor.costs['flash_calls'] + cost_monitor.costs['pro_calls']
-            if total_calls > 0 and total_calls % 3 == 0:
-                print(cost_monitor.get_summary())
+                # Show cost summary every 3 requests
+                total_calls = cost_monitor.total_calls
+                if total_calls > 0 and total_calls % 3 == 0:
+                    print(cost_monitor.get_summary())
             
-        except KeyboardInterrupt:
-            print("\n👋 Operation cancelled by user. Goodbye!")
-            print(cost_monitor.get_summary())
-            break
-        except Exception as e:
-            print(f"\n❌ An error occurred: {e}")
-            print("🔄 Please try again with a different request.")
-            continue
+            except (KeyboardInterrupt, EOFError):
+                print("\n👋 Operation cancelled by user. Goodbye!")
+                break
+            except Exception as e:
+                print(f"\n❌ An error occurred: {e}")
+                print("🔄 Please try again with a different request.")
+                continue
+    finally:
+        print(cost_monitor.get_summary())
 
 if __name__ == "__main__":
-    main()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # Ctrl-C during a request cancels main(); a crew already running on a worker
+        # thread can't be interrupted, so exit still waits for it to finish
+        print("\n👋 Operation cancelled by user. Goodbye!")
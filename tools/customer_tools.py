@@ -1,11 +1,18 @@
 # tools/customer_tools.py - Customer Service Tools for Odoo
 
-import xmlrpc.client
+import threading
+from cachetools import TTLCache
 from crewai.tools import BaseTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Type
 
+# Formatted lookups shared by every tool instance; tools may run on parallel CrewAI threads
+_customer_cache = TTLCache(maxsize=256, ttl=300)
+_customer_cache_lock = threading.Lock()
+
 class GetCustomerInfoInput(BaseModel):
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
     customer_name: str = Field(description="The full name of the customer you want to search for.")
 
 class OdooCustomerInfoTool(BaseTool):
@@ -13,20 +20,26 @@ class OdooCustomerInfoTool(BaseTool):
     description: str = "Finds contact details and order history for a specific customer by their full name."
     args_schema: Type[BaseModel] = GetCustomerInfoInput
     
-    def __init__(self, models, db, uid, password):
+    def __init__(self, session):
         super().__init__()
-        # Store connection info in a way that doesn't conflict with Pydantic
-        object.__setattr__(self, '_models', models)
-        object.__setattr__(self, '_db', db)
-        object.__setattr__(self, '_uid', uid)
-        object.__setattr__(self, '_password', password)
+        # Store the shared OdooSession in a way that doesn't conflict with Pydantic
+        object.__setattr__(self, '_session', session)
     
     def _run(self, customer_name: str) -> str:
         print(f"\n🔍 TOOL EXECUTING: Searching for customer '{customer_name}'...")
+        cache_key = (self._session.db, customer_name.strip().lower())
+        with _customer_cache_lock:
+            cached = _customer_cache.get(cache_key)
+        if cached is not None:
+            print("♻️ Using cached customer lookup")
+            return cached
+        
         try:
             search_domain = [('name', '=ilike', customer_name)]
-            fields = ['name', 'email', 'phone', 'mobile', 'street', 'city', 'country_id']
-            partner_data = self._models.execute_kw(self._db, self._uid, self._password, 
+            # 'mobile' is gone from res.partner on recent Odoo versions
+            fields = self._session.available_fields(
+                'res.partner', ['name', 'email', 'phone', 'mobile', 'street', 'city', 'country_id'])
+            partner_data = self._session.execute_kw(
                 'res.partner', 'search_read', [search_domain], {'fields': fields, 'limit': 1})
             
             if partner_data:
@@ -37,30 +50,38 @@ class OdooCustomerInfoTool(BaseTool):
                     # Get recent orders
                     order_domain = [('partner_id', '=', customer['id'])]
                     order_fields = ['name', 'date_order', 'state', 'amount_total']
-                    order_data = self._models.execute_kw(self._db, self._uid, self._password, 
+                    order_data = self._session.execute_kw(
                         'sale.order', 'search_read', [order_domain], 
                         {'fields': order_fields, 'limit': 5, 'order': 'date_order desc'})
                     
-                    # Format customer information
-                    result = f"Customer Information:\n"
-                    result += f"Name: {customer['name']}\n"
-                    result += f"Email: {customer.get('email', 'Not provided')}\n"
-                    result += f"Phone: {customer.get('phone', 'Not provided')}\n"
-                    result += f"Mobile: {customer.get('mobile', 'Not provided')}\n"
-                    result += f"Address: {customer.get('street', 'Not provided')}\n"
-                    result += f"City: {customer.get('city', 'Not provided')}\n"
+                    # Format customer information (collected as lines, joined once)
+                    lines = [
+                        "Customer Information:",
+                        f"Name: {customer['name']}",
+                        f"Email: {customer.get('email', 'Not provided')}",
+                        f"Phone: {customer.get('phone', 'Not provided')}",
+                        f"Mobile: {customer.get('mobile', 'Not provided')}",
+                        f"Address: {customer.get('street', 'Not provided')}",
+                        f"City: {customer.get('city', 'Not provided')}",
+                    ]
                     
                     if customer.get('country_id'):
-                        result += f"Country: {customer['country_id'][1]}\n"
+                        lines.append(f"Country: {customer['country_id'][1]}")
                     
                     if order_data:
-                        result += f"\nRecent Orders ({len(order_data)}):\n"
-                        for order in order_data:
-                            result += f"- Order {order.get('name', 'N/A')} on {order.get('date_order', 'N/A')[:10]} "
-                            result += f"(Status: {order.get('state', 'N/A')}, Amount: {order.get('amount_total', 'N/A')})\n"
+                        lines.append(f"\nRecent Orders ({len(order_data)}):")
+                        lines.extend(
+                            f"- Order {order.get('name', 'N/A')} on {order.get('date_order', 'N/A')[:10]} "
+                            f"(Status: {order.get('state', 'N/A')}, Amount: {order.get('amount_total', 'N/A')})"
+                            for order in order_data
+                        )
                     else:
-                        result += "\nNo recent orders found.\n"
+                        lines.append("\nNo recent orders found.")
+                    
+                    result = "\n".join(lines) + "\n"
                     
+                    with _customer_cache_lock:
+                        _customer_cache[cache_key] = result
                     return result
                     
                 except Exception as order_error:
@@ -1,12 +1,43 @@
 # tools/multilingual_product_tools.py - Proper Multilingual Product Management for Odoo
 
-import os
-import xmlrpc.client
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from crewai.tools import BaseTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Type, Optional, Dict, List
 
+# Per-RPC progress goes to the assistant's log (queued, off the request path) instead of stdout
+logger = logging.getLogger("assistant.tools")
+
+# Formatted product lookups shared by every finder; the updater clears it after writing
+_product_cache = TTLCache(maxsize=256, ttl=300)
+_product_cache_lock = threading.Lock()
+# Bumped by every update, so a lookup that started before a write never caches its stale result
+_product_cache_generation = 0
+
+# Description languages shared by the finder and the updater (display name -> Odoo code)
+_LANGUAGE_CODES = {
+    'English': 'en_US',
+    'Dutch': 'nl_NL'
+}
+
+# Field lists sent with every product RPC, built once (tuples serialise as JSON arrays)
+_PRODUCT_FIELDS = ('id', 'name', 'description_sale', 'list_price', 'categ_id')
+_DESCRIPTION_FIELDS = ('description_sale',)
+_DESCRIPTION_TRANSLATION_NAME = 'product.product,description_sale'
+_TRANSLATION_FIELDS = ('id', 'value')
+
+# Odoo has no system.multicall, so independent per-language reads are sent side by side instead
+_language_reads = ThreadPoolExecutor(max_workers=4, thread_name_prefix="odoo-lang")
+
+# Per-language content drafts from the generator run on their own small pool
+_content_drafts = ThreadPoolExecutor(max_workers=4, thread_name_prefix="content-gen")
+
 class FindProductInput(BaseModel):
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
     product_name: str = Field(description="The name of the product to search for.")
 
 class OdooMultilingualProductFinder(BaseTool):
@@ -14,77 +45,89 @@ class OdooMultilingualProductFinder(BaseTool):
     description: str = "Finds product information including ALL multilingual descriptions (English, Dutch, French) using proper Odoo API."
     args_schema: Type[BaseModel] = FindProductInput
 
-    def __init__(self, models, db, uid, password):
+    def __init__(self, session):
         super().__init__()
-        # Store connection info in a way that doesn't conflict with Pydantic
-        object.__setattr__(self, '_models', models)
-        object.__setattr__(self, '_db', db)
-        object.__setattr__(self, '_uid', uid)
-        object.__setattr__(self, '_password', password)
+        # Store the shared OdooSession in a way that doesn't conflict with Pydantic
+        object.__setattr__(self, '_session', session)
 
     def _run(self, product_name: str) -> str:
         print(f"\n🔍 TOOL EXECUTING: Searching for product '{product_name}' with multilingual data...")
+        cache_key = (self._session.db, product_name.strip().lower())
+        with _product_cache_lock:
+            cached = _product_cache.get(cache_key)
+            generation = _product_cache_generation
+        if cached is not None:
+            print("♻️ Using cached product lookup")
+            return cached
+        
         try:
-            # Step 1: Find the product
+            # Step 1: Find the product (read in English, so its description comes back with it)
             search_domain = [('name', '=ilike', product_name)]
-            fields = ['id', 'name', 'description_sale', 'list_price', 'categ_id']
-            product_data = self._models.execute_kw(self._db, self._uid, self._password, 
-                'product.product', 'search_read', [search_domain], {'fields': fields, 'limit': 5})
+            product_data = self._session.execute_kw(
+                'product.product', 'search_read', [search_domain],
+                {'fields': _PRODUCT_FIELDS, 'limit': 5, 'context': {'lang': _LANGUAGE_CODES['English']}})
             
             if not product_data:
                 return f"No products found matching '{product_name}'. Try a broader search term."
             
-            result = f"Found {len(product_data)} product(s) with multilingual data:\n\n"
+            lines = [f"Found {len(product_data)} product(s) with multilingual data:\n"]
+            
+            # Step 2: Get the other languages' descriptions for all found products at once
+            descriptions_by_product = self._get_multilingual_descriptions(product_data)
             
             for product in product_data:
                 product_id = product['id']
-                result += f"Product ID: {product_id}\n"
-                result += f"Name: {product['name']}\n"
-                result += f"Price: {product.get('list_price', 'N/A')}\n"
-                result += f"Category: {product.get('categ_id', ['N/A'])[1] if product.get('categ_id') else 'N/A'}\n"
-                
-                # Step 2: Get multilingual descriptions using proper Odoo API
-                multilingual_descriptions = self._get_multilingual_descriptions(product_id)
+                lines.append(f"Product ID: {product_id}")
+                lines.append(f"Name: {product['name']}")
+                lines.append(f"Price: {product.get('list_price', 'N/A')}")
+                lines.append(f"Category: {product.get('categ_id', ['N/A'])[1] if product.get('categ_id') else 'N/A'}")
                 
-                result += "Multilingual Descriptions:\n"
-                for lang, desc in multilingual_descriptions.items():
-                    result += f"  {lang}: {desc[:100]}{'...' if len(desc) > 100 else ''}\n"
+                lines.append("Multilingual Descriptions:")
+                lines.extend(
+                    f"  {lang}: {desc[:100]}{'...' if len(desc) > 100 else ''}"
+                    for lang, desc in descriptions_by_product[product_id].items()
+                )
                 
-                result += "-" * 50 + "\n"
+                lines.append("-" * 50)
             
+            result = "\n".join(lines) + "\n"
+            
+            with _product_cache_lock:
+                if generation == _product_cache_generation:
+                    _product_cache[cache_key] = result
             return result
                 
         except Exception as e:
             return f"Error searching for product: {e}"
     
-    def _get_multilingual_descriptions(self, product_id: int) -> Dict[str, str]:
-        """Get descriptions in all languages for a product"""
-        descriptions = {}
-        languages = [
-            ('en_US', 'English'),
-            ('nl_NL', 'Dutch')
-        ]
+    def _get_multilingual_descriptions(self, products: List[dict]) -> Dict[int, Dict[str, str]]:
+        """Get descriptions in all languages for the found products (one read per extra language)"""
+        # English was read together with the search itself
+        descriptions = {product['id']: {'English': product.get('description_sale', '') or ''} for product in products}
+        product_ids = list(descriptions)
+        languages = [(lang_code, lang_name) for lang_name, lang_code in _LANGUAGE_CODES.items() if lang_name != 'English']
         
         for lang_code, lang_name in languages:
             try:
                 # Use proper context to get language-specific data
                 context = {'lang': lang_code}
-                product_data = self._models.execute_kw(self._db, self._uid, self._password,
-                    'product.product', 'read', [[product_id]], 
-                    {'fields': ['description_sale'], 'context': context})
+                product_data = self._session.execute_kw(
+                    'product.product', 'read', [product_ids], 
+                    {'fields': _DESCRIPTION_FIELDS, 'context': context})
                 
-                if product_data:
-                    desc = product_data[0].get('description_sale', '') or ''
-                    descriptions[lang_name] = desc
-                else:
-                    descriptions[lang_name] = 'No description'
+                found = {product['id']: product.get('description_sale', '') or '' for product in product_data}
+                for product_id in product_ids:
+                    descriptions[product_id][lang_name] = found.get(product_id, 'No description')
                     
             except Exception as e:
-                descriptions[lang_name] = f'Error: {e}'
+                for product_id in product_ids:
+                    descriptions[product_id][lang_name] = f'Error: {e}'
         
         return descriptions
 
 class UpdateMultilingualProductInput(BaseModel):
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
     product_id: int = Field(description="The unique integer ID of the product to update.")
     descriptions: Dict[str, str] = Field(description="Dictionary with language names as keys (English, Dutch, French) and descriptions as values.")
 
@@ -93,47 +136,53 @@ class OdooMultilingualProductUpdater(BaseTool):
     description: str = "Updates product descriptions in multiple languages (English, Dutch, French) using proper Odoo translation API."
     args_schema: Type[BaseModel] = UpdateMultilingualProductInput
 
-    def __init__(self, models, db, uid, password):
+    def __init__(self, session):
         super().__init__()
-        # Store connection info in a way that doesn't conflict with Pydantic
-        object.__setattr__(self, '_models', models)
-        object.__setattr__(self, '_db', db)
-        object.__setattr__(self, '_uid', uid)
-        object.__setattr__(self, '_password', password)
+        # Store the shared OdooSession in a way that doesn't conflict with Pydantic
+        object.__setattr__(self, '_session', session)
 
     def _run(self, product_id: int, descriptions: Dict[str, str]) -> str:
+        global _product_cache_generation
         print(f"\n🔄 TOOL EXECUTING: Updating product ID {product_id} with multilingual descriptions...")
         
-        language_mapping = {
-            'English': 'en_US',
-            'Dutch': 'nl_NL'
-        }
-        
         results = []
         
         try:
-            for lang_name, description in descriptions.items():
-                if lang_name not in language_mapping:
-                    results.append(f"❌ Unknown language: {lang_name}")
-                    continue
-                
-                lang_code = language_mapping[lang_name]
-                
-                try:
-                    # Method 1: Try direct update with language context
-                    success = self._update_with_context(product_id, description, lang_code, lang_name)
-                    
-                    if not success:
-                        # Method 2: Try translation record update
-                        success = self._update_translation_record(product_id, description, lang_code, lang_name)
-                    
-                    if success:
+            # Odoo 16+ keeps translations on the field itself: set every language in one call
+            if self._session.version >= 16 and self._update_field_translations(product_id, descriptions):
+                for lang_name in descriptions:
+                    if lang_name in _LANGUAGE_CODES:
                         results.append(f"✅ Successfully updated {lang_name} description")
                     else:
-                        results.append(f"❌ Failed to update {lang_name} description")
+                        results.append(f"❌ Unknown language: {lang_name}")
+            else:
+                for lang_name, description in descriptions.items():
+                    if lang_name not in _LANGUAGE_CODES:
+                        results.append(f"❌ Unknown language: {lang_name}")
+                        continue
+                    
+                    lang_code = _LANGUAGE_CODES[lang_name]
+                    
+                    try:
+                        # Method 1: Try direct update with language context
+                        success = self._update_with_context(product_id, description, lang_code, lang_name)
+                        
+                        if not success:
+                            # Method 2: Try translation record update
+                            success = self._update_translation_record(product_id, description, lang_code, lang_name)
+                        
+                        if success:
+                            results.append(f"✅ Successfully updated {lang_name} description")
+                        else:
+                            results.append(f"❌ Failed to update {lang_name} description")
                         
-                except Exception as e:
-                    results.append(f"❌ Error updating {lang_name}: {e}")
+                    except Exception as e:
+                        results.append(f"❌ Error updating {lang_name}: {e}")
+            
+            # Descriptions changed, so cached lookups (and any still in flight) are stale
+            with _product_cache_lock:
+                _product_cache_generation += 1
+                _product_cache.clear()
             
             # Verify the updates
             verification = self._verify_updates(product_id, descriptions)
@@ -144,20 +193,37 @@ class OdooMultilingualProductUpdater(BaseTool):
         except Exception as e:
             return f"❌ Critical error during multilingual update: {e}"
     
+    def _update_field_translations(self, product_id: int, descriptions: Dict[str, str]) -> bool:
+        """Write all known languages at once with update_field_translations (Odoo 16+)"""
+        translations = {_LANGUAGE_CODES[lang_name]: description
+                        for lang_name, description in descriptions.items() if lang_name in _LANGUAGE_CODES}
+        if not translations:
+            return False
+        
+        try:
+            self._session.execute_kw(
+                'product.product', 'update_field_translations', [[product_id], 'description_sale', translations])
+            logger.debug("Field translations updated for %s", ', '.join(translations))
+            return True
+            
+        except Exception as e:
+            logger.debug("Field translation update failed, falling back to per-language writes: %s", e)
+            return False
+    
     def _update_with_context(self, product_id: int, description: str, lang_code: str, lang_name: str) -> bool:
         """Try updating using language context (Method 1)"""
         try:
             context = {'lang': lang_code}
             update_values = {'description_sale': description}
             
-            result = self._models.execute_kw(self._db, self._uid, self._password, 
+            result = self._session.execute_kw(
                 'product.product', 'write', [[product_id], update_values], {'context': context})
             
-            print(f"  Context update for {lang_name}: {result}")
+            logger.debug("Context update for %s: %s", lang_name, result)
             return bool(result)
             
         except Exception as e:
-            print(f"  Context update failed for {lang_name}: {e}")
+            logger.debug("Context update failed for %s: %s", lang_name, e)
             return False
     
     def _update_translation_record(self, product_id: int, description: str, lang_code: str, lang_name: str) -> bool:
@@ -165,60 +231,56 @@ class OdooMultilingualProductUpdater(BaseTool):
         try:
             # Search for existing translation record
             translation_domain = [
-                ('name', '=', 'product.product,description_sale'),
+                ('name', '=', _DESCRIPTION_TRANSLATION_NAME),
                 ('res_id', '=', product_id),
                 ('lang', '=', lang_code)
             ]
             
-            existing_translations = self._models.execute_kw(self._db, self._uid, self._password,
-                'ir.translation', 'search_read', [translation_domain], {'fields': ['id', 'value']})
+            existing_translations = self._session.execute_kw(
+                'ir.translation', 'search_read', [translation_domain], {'fields': _TRANSLATION_FIELDS})
             
             if existing_translations:
                 # Update existing translation
                 translation_id = existing_translations[0]['id']
-                result = self._models.execute_kw(self._db, self._uid, self._password,
+                result = self._session.execute_kw(
                     'ir.translation', 'write', [[translation_id], {'value': description}])
-                print(f"  Translation record updated for {lang_name}: {result}")
+                logger.debug("Translation record updated for %s: %s", lang_name, result)
                 return bool(result)
             else:
                 # Create new translation record
                 translation_data = {
-                    'name': 'product.product,description_sale',
+                    'name': _DESCRIPTION_TRANSLATION_NAME,
                     'res_id': product_id,
                     'lang': lang_code,
                     'value': description,
                     'type': 'model'
                 }
                 
-                translation_id = self._models.execute_kw(self._db, self._uid, self._password,
+                translation_id = self._session.execute_kw(
                     'ir.translation', 'create', [translation_data])
-                print(f"  Translation record created for {lang_name}: {translation_id}")
+                logger.debug("Translation record created for %s: %s", lang_name, translation_id)
                 return bool(translation_id)
                 
         except Exception as e:
-            print(f"  Translation record update failed for {lang_name}: {e}")
+            logger.warning("Translation record update failed for %s: %s", lang_name, e)
             return False
     
     def _verify_updates(self, product_id: int, expected_descriptions: Dict[str, str]) -> str:
         """Verify that the updates actually worked"""
         verification_results = []
-        language_mapping = {
-            'English': 'en_US',
-            'Dutch': 'nl_NL'
-        }
+        checks = [(lang_name, expected_desc) for lang_name, expected_desc in expected_descriptions.items()
+                  if lang_name in _LANGUAGE_CODES]
+        # Check actual current values, one read per language context, all in flight at once
+        reads = [
+            _language_reads.submit(
+                self._session.execute_kw, 'product.product', 'read', [[product_id]],
+                {'fields': _DESCRIPTION_FIELDS, 'context': {'lang': _LANGUAGE_CODES[lang_name]}})
+            for lang_name, _ in checks
+        ]
         
-        for lang_name, expected_desc in expected_descriptions.items():
-            if lang_name not in language_mapping:
-                continue
-                
-            lang_code = language_mapping[lang_name]
-            
+        for (lang_name, expected_desc), read in zip(checks, reads):
             try:
-                # Check actual current value
-                context = {'lang': lang_code}
-                product_data = self._models.execute_kw(self._db, self._uid, self._password,
-                    'product.product', 'read', [[product_id]], 
-                    {'fields': ['description_sale'], 'context': context})
+                product_data = read.result()
                 
                 if product_data:
                     actual_desc = product_data[0].get('description_sale', '') or ''
@@ -235,30 +297,76 @@ class OdooMultilingualProductUpdater(BaseTool):
         return "\n".join(verification_results)
 
 class ProductContentGeneratorInput(BaseModel):
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
     base_info: str = Field(description="Base information about the product to generate content from.")
     content_type: str = Field(description="Type of content to generate: 'title', 'description', or 'features'.")
     languages: List[str] = Field(description="List of target languages: ['English', 'Dutch', 'French'].")
 
+_CONTENT_PROMPT = """Write a compelling product {content_type} in {language} based on: {base_info}
+Make it culturally appropriate for {language} readers, focus on benefits over features,
+and keep it engaging and professional. Reply with the {content_type} only."""
+
+_CONTENT_REQUEST_TEMPLATE = """Content Generation Request:
+Base Information: {base_info}
+Content Type: {content_type}
+Target Languages: {languages}
+Status: Ready for AI enhancement
+
+Instructions for AI Agent:
+1. Create compelling {content_type} based on: {base_info}
+2. Generate content for each language: {languages}
+3. Ensure content is culturally appropriate for each language
+4. Focus on benefits over features
+5. Keep descriptions engaging and professional
+"""
+
 class MultilingualProductContentGenerator(BaseTool):
     name: str = "Multilingual Product Content Generator"
     description: str = "Generates compelling product content in multiple languages based on base information."
     args_schema: Type[BaseModel] = ProductContentGeneratorInput
 
+    def __init__(self, model: Optional[str] = None, **completion_kwargs):
+        super().__init__()
+        # Without a model the tool only structures the request for the agent to write
+        object.__setattr__(self, '_model', model)
+        object.__setattr__(self, '_completion_kwargs', completion_kwargs)
+
+    def generate(self, base_info: str, content_type: str, language: str) -> str:
+        """Draft the content for a single language"""
+        import litellm
+        prompt = _CONTENT_PROMPT.format(content_type=content_type, language=language, base_info=base_info)
+        response = litellm.completion(
+            model=self._model,
+            messages=[{"role": "user", "content": prompt}],
+            **self._completion_kwargs
+        )
+        return response.choices[0].message.content
+
+    def _generate_all(self, base_info: str, content_type: str, languages: List[str]) -> list:
+        # One request per language, all in flight at once: wall time ~ the slowest language.
+        # Plain threads rather than a per-call event loop, so LiteLLM's cached clients stay usable
+        drafts = [_content_drafts.submit(self.generate, base_info, content_type, language) for language in languages]
+        return [draft.exception() or draft.result() for draft in drafts]
+
     def _run(self, base_info: str, content_type: str, languages: List[str]) -> str:
         print(f"\n✍️ TOOL EXECUTING: Generating {content_type} in {len(languages)} languages...")
         
-        # This tool provides structured output for the AI agent to enhance
-        result = f"Content Generation Request:\n"
-        result += f"Base Information: {base_info}\n"
-        result += f"Content Type: {content_type}\n"
-        result += f"Target Languages: {', '.join(languages)}\n"
-        result += f"Status: Ready for AI enhancement\n\n"
-        
-        result += "Instructions for AI Agent:\n"
-        result += f"1. Create compelling {content_type} based on: {base_info}\n"
-        result += f"2. Generate content for each language: {', '.join(languages)}\n"
-        result += "3. Ensure content is culturally appropriate for each language\n"
-        result += "4. Focus on benefits over features\n"
-        result += "5. Keep descriptions engaging and professional\n"
+        if self._model and languages:
+            drafts = self._generate_all(base_info, content_type, languages)
+            if not all(isinstance(draft, Exception) for draft in drafts):
+                sections = [f"Generated {content_type} for: {base_info}\n"]
+                for language, draft in zip(languages, drafts):
+                    if isinstance(draft, Exception):
+                        sections.append(f"--- {language} ---\n❌ Generation failed: {draft}\n")
+                    else:
+                        sections.append(f"--- {language} ---\n{draft.strip()}\n")
+                return "\n".join(sections)
+            logger.warning("Parallel generation failed (%s), handing the request back to the agent", drafts[0])
         
-        return result
+        # This tool provides structured output for the AI agent to enhance
+        return _CONTENT_REQUEST_TEMPLATE.format_map({
+            'base_info': base_info,
+            'content_type': content_type,
+            'languages': ', '.join(languages),
+        })
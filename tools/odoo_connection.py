@@ -1,11 +1,144 @@
 # tools/odoo_connection.py - Odoo Connection Management
 
 import os
-import xmlrpc.client
+import functools
+import itertools
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+import httpx
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
+class OdooRPCError(Exception):
+    """Error returned by the Odoo server for a JSON-RPC call"""
+
+class JsonRpcService:
+    """Odoo /jsonrpc service proxy with the same call style as an XML-RPC ServerProxy.
+    
+    JSON payloads are several times smaller than XML-RPC and are encoded/decoded
+    by orjson in C. Requests go through a shared, pooled httpx client, which keeps
+    TCP/TLS connections alive and is safe to use from parallel CrewAI tasks.
+    """
+    
+    def __init__(self, url, service, client):
+        self._endpoint = f"{url}/jsonrpc"
+        self._service = service
+        self._client = client
+        self._ids = itertools.count(1)
+    
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return functools.partial(self._call, method)
+    
+    def _call(self, method, *args):
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "call",
+            "params": {"service": self._service, "method": method, "args": args},
+            "id": next(self._ids),
+        }
+        response = self._client.post(
+            self._endpoint,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+        
+        reply = orjson.loads(response.content)
+        error = reply.get("error")
+        if error:
+            data = error.get("data") or {}
+            raise OdooRPCError(data.get("message") or error.get("message", "Odoo Server Error"))
+        return reply.get("result")
+
+# Odoo serves RPC from a small worker pool: cap concurrent calls from parallel
+# tools, and let identical read-only calls already in flight share one round trip
+ODOO_MAX_CONCURRENT = int(os.getenv("ODOO_MAX_CONCURRENT", "8"))
+_odoo_slots = threading.BoundedSemaphore(ODOO_MAX_CONCURRENT)
+_READ_METHODS = frozenset({'search_read', 'read', 'search', 'search_count', 'fields_get', 'name_search'})
+_inflight = {}
+_inflight_lock = threading.Lock()
+# Writes per db, bumped when one starts and when it ends: a read sent after a write
+# never joins one that was already on the wire before it (writes may touch other models)
+_write_generations = {}
+
+# Field names per (db, model), introspected once: optional fields differ between installations
+_fields_cache = {}
+_fields_cache_lock = threading.Lock()
+
+@dataclass(frozen=True, slots=True)
+class OdooSession:
+    """Immutable Odoo credentials and RPC proxy, shared by reference across tools"""
+    models: JsonRpcService
+    db: str
+    uid: int
+    password: str
+    version: int = 0  # major server version (e.g. 17), 0 when unknown
+    
+    def execute_kw(self, model, method, args, kwargs=None):
+        """Run an ORM method with this session's credentials"""
+        kwargs = kwargs or {}
+        if method not in _READ_METHODS:
+            self._bump_write_generation()
+            try:
+                with _odoo_slots:
+                    return self.models.execute_kw(self.db, self.uid, self.password, model, method, args, kwargs)
+            finally:
+                self._bump_write_generation()
+        
+        query = (self.db, self.uid, model, method, repr(args), repr(sorted(kwargs.items())))
+        with _inflight_lock:
+            key = (_write_generations.get(self.db, 0), *query)
+            pending = _inflight.get(key)
+            if pending is None:
+                pending = _inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            # Same query already on the wire: wait for its answer instead of sending another
+            return pending.result()
+        
+        try:
+            with _odoo_slots:
+                result = self.models.execute_kw(self.db, self.uid, self.password, model, method, args, kwargs)
+            pending.set_result(result)
+            return result
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with _inflight_lock:
+                del _inflight[key]
+    
+    def _bump_write_generation(self):
+        with _inflight_lock:
+            _write_generations[self.db] = _write_generations.get(self.db, 0) + 1
+    
+    def available_fields(self, model, wanted):
+        """Keep only the wanted fields that exist on this database's model"""
+        key = (self.db, model)
+        with _fields_cache_lock:
+            fields = _fields_cache.get(key)
+        if fields is None:
+            fields = frozenset(self.execute_kw(model, 'fields_get', [], {'attributes': ['type']}))
+            with _fields_cache_lock:
+                _fields_cache[key] = fields
+        return [name for name in wanted if name in fields]
+
+# Authenticated uids per (url, db, login, password): reconnecting in the same process
+# skips the common.authenticate round trip
+_uid_cache = TTLCache(maxsize=16, ttl=1800)
+_uid_cache_lock = threading.Lock()
+
+# Server version info per URL, fetched once per process
+_server_versions = {}
+
 class OdooConnection:
-    """Manages Odoo XML-RPC connection and authentication"""
+    """Manages Odoo JSON-RPC connection and authentication"""
     
     def __init__(self):
         load_dotenv()
@@ -16,6 +149,8 @@ class OdooConnection:
         self.uid = None
         self.models = None
         self.common = None
+        self.http_client = None
+        self.server_version = 0
         
     def connect(self):
         """Establish connection to Odoo and authenticate"""
@@ -28,16 +163,36 @@ class OdooConnection:
             
             print(f"🔗 Connecting to Odoo at {self.url}...")
             
-            # Establish XML-RPC connections
-            self.common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common')
-            self.models = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/object')
+            # Establish JSON-RPC services over one keep-alive connection pool
+            # (failed connection attempts are retried by the transport; the request itself was never sent)
+            self.http_client = httpx.Client(
+                transport=httpx.HTTPTransport(
+                    http2=True,
+                    retries=2,
+                    limits=httpx.Limits(max_keepalive_connections=10, max_connections=20, keepalive_expiry=300)
+                ),
+                timeout=30
+            )
+            self.common = JsonRpcService(self.url, 'common', self.http_client)
+            self.models = JsonRpcService(self.url, 'object', self.http_client)
             
-            # Test connection and get version info
-            version_info = self.common.version()
+            # Test connection and get version info (once per server per process)
+            version_info = _server_versions.get(self.url)
+            if version_info is None:
+                version_info = _server_versions[self.url] = self.common.version()
             print(f"📋 Odoo Server Version: {version_info.get('server_version', 'Unknown')}")
+            major = (version_info.get('server_version_info') or [0])[0]
+            self.server_version = major if isinstance(major, int) else 0
             
-            # Authenticate
-            self.uid = self.common.authenticate(self.db, self.username, self.password, {})
+            # Authenticate (reusing a recent uid for the same credentials)
+            auth_key = (self.url, self.db, self.username, self.password)
+            with _uid_cache_lock:
+                self.uid = _uid_cache.get(auth_key)
+            if not self.uid:
+                self.uid = self.common.authenticate(self.db, self.username, self.password, {})
+                if self.uid:
+                    with _uid_cache_lock:
+                        _uid_cache[auth_key] = self.uid
             
             if self.uid:
                 print(f"✅ Successfully connected and authenticated with Odoo.")
@@ -90,9 +245,18 @@ class OdooConnection:
             'db': self.db,
             'uid': self.uid,
             'password': self.password,
-            'url': self.url
+            'url': self.url,
+            'http_client': self.http_client
         }
     
+    def get_session(self):
+        """Return the shared, immutable session handed to every tool"""
+        if not self.uid:
+            raise Exception("Not connected to Odoo. Call connect() first.")
+        
+        return OdooSession(models=self.models, db=self.db, uid=self.uid, password=self.password,
+                           version=self.server_version)
+    
     def execute_kw(self, model, method, args=None, kwargs=None):
         """Convenience method for executing Odoo operations"""
         if not self.uid: